@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""Check locale .po files for empty or untranslated strings.
+
+Walks ../locale (same layout as update_messages.sh), parses every
+<locale>/LC_MESSAGES/<xx>.po and reports entries whose msgstr is empty
+or identical to the msgid.  Technical terms that are deliberately left
+untranslated can be listed in untranslated_exclusions.json next to this
+script.
+"""
+
+import functools
+import json
+import mmap
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+LOCALE_DIR = Path(__file__).resolve().parent.parent / 'locale'
+EXCLUSIONS_FILE = Path(__file__).resolve().parent / 'untranslated_exclusions.json'
+
+# compiled once at import time; these run on every line / every entry
+_RE_MSGSTR_PLURAL = re.compile(r'msgstr\[(\d+)\] (.+)')
+_RE_WORDS = re.compile(r'\b\w+\b')
+_RE_UNESCAPE = re.compile(r'\\(.)')
+_UNESCAPES = {'n': '\n', 't': '\t'}
+
+
+def _unescape_match(m):
+    c = m.group(1)
+    return _UNESCAPES.get(c, c)
+
+
+def load_exclusions():
+    """Return the terms that may legitimately stay untranslated.
+
+    Returned as a casefolded frozenset so membership tests are O(1).
+    """
+    if not EXCLUSIONS_FILE.exists():
+        return frozenset()
+    with open(EXCLUSIONS_FILE, encoding='utf-8') as f:
+        data = json.load(f)
+    return frozenset(e.casefold() for e in data.get('exclusions', []))
+
+
+_exclusions = None
+
+
+def _get_exclusions():
+    global _exclusions
+    if _exclusions is None:
+        _exclusions = load_exclusions()
+    return _exclusions
+
+
+@functools.lru_cache(maxsize=200_000)
+def is_excluded(msgid):
+    """True if every word of msgid is a known technical term.
+
+    Memoized on msgid alone: the same msgids recur in every locale's .po
+    file, and the exclusion set is fixed for the lifetime of a process.
+    """
+    exclusions = _get_exclusions()
+    if msgid.casefold() in exclusions:
+        return True
+    words = _RE_WORDS.findall(msgid)
+    if not words:
+        return False
+    return all(word.casefold() in exclusions for word in words)
+
+
+@dataclass(slots=True)
+class Entry:
+    """One msgid/msgstr pair from a .po file."""
+
+    msgid: str = ''
+    msgstr: str = ''
+    msgid_plural: str = ''
+    msgstr_plural: dict = None
+    fuzzy: bool = False
+    line: int = 0
+
+
+def extract_string(line):
+    """Strip the surrounding quotes from a po string line and unescape it."""
+    s = line[line.index('"') + 1:line.rindex('"')]
+    if '\\' not in s:
+        # most msgids contain no escapes; skip the substitution pass
+        return s
+    # decode left to right in one pass so '\\\\' followed by 'n' or 't'
+    # is an escaped backslash, not a newline or tab
+    return _RE_UNESCAPE.sub(_unescape_match, s)
+
+
+def _parse_lines(lines, first_lineno=1):
+    """Yield Entry objects from an iterable of .po lines.
+
+    Keeps a small state machine over the lines instead of splitting the
+    input into blocks first: cur_key tracks which string the next
+    continuation line belongs to, a blank line closes the entry.
+    """
+    entry = None
+    cur_key = None
+    buffers = {}
+
+    def finalize():
+        plural = {}
+        for key, buf in buffers.items():
+            if isinstance(key, tuple):
+                plural[key[1]] = ''.join(buf)
+        return Entry(
+            msgid=''.join(buffers.get('msgid', [])),
+            msgstr=''.join(buffers.get('msgstr', [])),
+            msgid_plural=''.join(buffers.get('msgid_plural', [])),
+            msgstr_plural=plural or None,
+            fuzzy=entry['fuzzy'],
+            line=entry['line'],
+        )
+
+    for lineno, line in enumerate(lines, first_lineno):
+        stripped = line.strip()
+        if not stripped:
+            if entry is not None and 'msgid' in buffers:
+                yield finalize()
+            entry = None
+            cur_key = None
+            buffers = {}
+            continue
+        if entry is None:
+            entry = {'fuzzy': False, 'line': lineno}
+        # dispatch on the first character; continuation lines are by
+        # far the most common, keyword lines all start with 'm'
+        first = stripped[0]
+        if first == '"':
+            if cur_key is not None:
+                buffers[cur_key].append(extract_string(stripped))
+        elif first == 'm':
+            if stripped.startswith('msgstr '):
+                cur_key = 'msgstr'
+                buffers[cur_key] = [extract_string(stripped)]
+            elif stripped.startswith('msgid '):
+                cur_key = 'msgid'
+                entry['line'] = lineno
+                buffers[cur_key] = [extract_string(stripped)]
+            elif stripped.startswith('msgstr['):
+                m = _RE_MSGSTR_PLURAL.match(stripped)
+                if m is not None:
+                    cur_key = ('msgstr', int(m.group(1)))
+                    buffers[cur_key] = [extract_string(stripped)]
+            elif stripped.startswith('msgid_plural '):
+                cur_key = 'msgid_plural'
+                buffers[cur_key] = [extract_string(stripped)]
+        elif first == '#':
+            # a substring test is enough: no other gettext flag
+            # contains 'fuzzy', so skip splitting out the flag list
+            if stripped.startswith('#,') and 'fuzzy' in stripped:
+                entry['fuzzy'] = True
+    if entry is not None and 'msgid' in buffers:
+        yield finalize()
+
+
+def _needs_full_parse(block):
+    """Cheap byte-level screen for a raw entry block.
+
+    Returns False only when the entry cannot be empty or untranslated:
+    no empty msgstr, no plural forms, and the msgid and msgstr lines
+    differ.  Anything unusual falls through to the real parser.
+    """
+    if b'msgstr ""' in block or b'msgid_plural' in block:
+        return True
+    i = block.find(b'msgid "')
+    j = block.find(b'msgstr "')
+    if i == -1 or j == -1:
+        return True
+    i_end = block.find(b'\n', i)
+    j_end = block.find(b'\n', j)
+    if i_end == -1:
+        i_end = len(block)
+    if j_end == -1:
+        j_end = len(block)
+    msgid_line = block[i + 6:i_end]
+    if msgid_line == b'""':
+        # wrapped msgid; the real text is on continuation lines, so the
+        # line comparison below would miss an identical msgstr
+        return True
+    return msgid_line == block[j + 7:j_end]
+
+
+def check_one_locale(task):
+    """Check a single locale; runs in a worker process.
+
+    task is a (po_file, lang) tuple; returns everything main() needs to
+    print so the workers never write to stdout themselves.  The checks
+    are classified in one batch pass over plain local variables rather
+    than a per-entry helper call.
+    """
+    po_file, lang = task
+    empty_count = 0
+    untranslated_count = 0
+    n_entries = 0
+    issues = []
+    append = issues.append
+    check_equal = lang != 'en_EN'
+
+    # open directly instead of probing with exists() first; locales
+    # without a .po file are skipped by the caller
+    try:
+        f = open(po_file, 'rb')
+    except FileNotFoundError:
+        return None
+
+    with f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return lang, po_file.name, 0, 0, 0, issues
+        # map the file instead of reading it: the kernel pages it in on
+        # demand and only candidate blocks are ever copied and decoded
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            # walk the raw bytes block by block; fully parse only blocks
+            # the byte screen cannot rule out (most entries are already
+            # translated)
+            size = len(data)
+            pos = 0
+            lineno = 1
+            while pos < size:
+                end = data.find(b'\n\n', pos)
+                if end == -1:
+                    end = size
+                block = data[pos:end]
+                if b'msgid "' in block:
+                    if _needs_full_parse(block):
+                        block_lines = block.decode('utf-8').split('\n')
+                        for entry in _parse_lines(block_lines, lineno):
+                            msgid = entry.msgid
+                            if not msgid:  # header entry
+                                continue
+                            n_entries += 1
+                            plural = entry.msgstr_plural
+                            if plural is not None:
+                                if any(not s for s in plural.values()):
+                                    empty_count += 1
+                                    append((entry.line, 'empty', msgid))
+                                continue
+                            msgstr = entry.msgstr
+                            if not msgstr:
+                                empty_count += 1
+                                append((entry.line, 'empty', msgid))
+                            elif (msgstr == msgid and check_equal
+                                    and not is_excluded(msgid)):
+                                untranslated_count += 1
+                                append((entry.line, 'untranslated', msgid))
+                    else:
+                        # screened-out blocks never hold the header (its
+                        # msgstr "" always forces a full parse), so the
+                        # byte count matches the parser's entry count
+                        n_entries += ((1 if block.startswith(b'msgid "')
+                                       else 0)
+                                      + block.count(b'\nmsgid "'))
+                lineno += block.count(b'\n') + 2
+                pos = end + 2
+    return lang, po_file.name, n_entries, empty_count, untranslated_count, issues
+
+
+def main():
+    locale_base = LOCALE_DIR
+    if not locale_base.is_dir():
+        print(f'Error: locale directory not found: {locale_base}')
+        return 1
+
+    # scandir gives the dir/file type from the directory entry itself,
+    # so listing the locales costs no extra stat per entry
+    with os.scandir(locale_base) as it:
+        lang_dirs = sorted((e.name for e in it
+                            if e.is_dir(follow_symlinks=False)))
+    tasks = [(locale_base / lang / 'LC_MESSAGES' / f'{lang[:2]}.po', lang)
+             for lang in lang_dirs]
+
+    # each locale is independent, so parse and check them in parallel
+    if len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = list(executor.map(check_one_locale, tasks, chunksize=2))
+    else:
+        results = [check_one_locale(task) for task in tasks]
+
+    total_empty = 0
+    total_untranslated = 0
+    for result in results:
+        if result is None:  # no .po file for this locale
+            continue
+        lang, po_name, n_entries, empty_count, untranslated_count, issues = result
+        print(f'{lang}: {n_entries} entries, '
+              f'{empty_count} empty, {untranslated_count} untranslated')
+        for line, kind, msgid in issues:
+            print(f'  {po_name}:{line}: {kind}: {msgid!r}')
+        total_empty += empty_count
+        total_untranslated += untranslated_count
+
+    print(f'Total: {total_empty} empty, {total_untranslated} untranslated')
+    return 1 if (total_empty or total_untranslated) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""Extract untranslated and fuzzy entries from a locale's .po file.
+
+Writes the entries that still need work to a JSON file that can be
+handed to translators (and later fed back with import_translations).
+Usage: ./extract_untranslated.py <locale> [-o output.json]
+"""
+
+import argparse
+import functools
+import itertools
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+try:
+    import polib
+except ImportError:
+    polib = None
+
+LOCALE_DIR = Path(__file__).resolve().parent.parent / 'locale'
+EXCLUSIONS_FILE = Path(__file__).resolve().parent / 'untranslated_exclusions.json'
+
+# compiled once at import time; these run on every line / every entry
+_RE_MSGSTR_PLURAL = re.compile(r'msgstr\[(\d+)\] (.+)')
+_RE_WORDS = re.compile(r'\b\w+\b')
+_RE_UNESCAPE = re.compile(r'\\(.)')
+_UNESCAPES = {'n': '\n', 't': '\t'}
+
+
+def _unescape_match(m):
+    c = m.group(1)
+    return _UNESCAPES.get(c, c)
+
+
+@dataclass(slots=True)
+class PoEntry:
+    """One msgid/msgstr pair from a .po file."""
+
+    msgid: str = ''
+    msgstr: str = ''
+    msgid_plural: str = ''
+    msgstr_plural: dict = field(default_factory=dict)
+    is_fuzzy: bool = False
+    line: int = 0
+    locations: list = field(default_factory=list)
+
+    @property
+    def is_untranslated(self):
+        if not self.msgid:  # header entry
+            return False
+        if self.msgid_plural:
+            return any(not s for s in self.msgstr_plural.values())
+        return self.msgstr == '' or self.msgstr == self.msgid
+
+
+class PoParser:
+    """Single-pass line parser for .po files."""
+
+    def __init__(self, po_file):
+        self.po_file = Path(po_file)
+        self.exclusions = self._load_exclusions()
+
+    def _load_exclusions(self):
+        if not EXCLUSIONS_FILE.exists():
+            return frozenset()
+        with open(EXCLUSIONS_FILE, encoding='utf-8') as f:
+            data = json.load(f)
+        return frozenset(e.casefold() for e in data.get('exclusions', []))
+
+    @functools.lru_cache(maxsize=None)
+    def is_excluded(self, msgid):
+        """True if every word of msgid is a known technical term."""
+        if msgid.casefold() in self.exclusions:
+            return True
+        words = _RE_WORDS.findall(msgid)
+        if not words:
+            return False
+        return all(word.casefold() in self.exclusions for word in words)
+
+    @staticmethod
+    def _extract_string(line):
+        s = line[line.index('"') + 1:line.rindex('"')]
+        if '\\' not in s:
+            # most msgids contain no escapes; skip the substitution pass
+            return s
+        # decode left to right in one pass so '\\\\' followed by 'n' or
+        # 't' is an escaped backslash, not a newline or tab
+        return _RE_UNESCAPE.sub(_unescape_match, s)
+
+    def parse(self):
+        """Return all entries of the .po file (header excluded).
+
+        Uses polib when it is installed, falling back to the built-in
+        line parser otherwise.
+        """
+        if polib is not None:
+            return self._parse_polib()
+        return self._parse_fallback()
+
+    def _parse_polib(self):
+        po = polib.pofile(str(self.po_file), encoding='utf-8')
+        return [
+            PoEntry(
+                msgid=pe.msgid,
+                msgstr=pe.msgstr,
+                msgid_plural=pe.msgid_plural,
+                msgstr_plural=dict(pe.msgstr_plural),
+                is_fuzzy='fuzzy' in pe.flags,
+                line=pe.linenum or 0,
+                locations=['%s:%s' % (f, l) if l else f
+                           for f, l in pe.occurrences],
+            )
+            for pe in po if not pe.obsolete
+        ]
+
+    def _parse_fallback(self):
+        """Scan the file line by line with the built-in state machine.
+
+        cur_key names the string the next continuation line belongs to;
+        a blank line closes the current entry.
+        """
+        entries = []
+        entry = None
+        cur_key = None
+        buffers = {}
+
+        def finalize():
+            plural = {}
+            for key, buf in buffers.items():
+                if isinstance(key, tuple):
+                    plural[key[1]] = ''.join(buf)
+            entries.append(PoEntry(
+                msgid=''.join(buffers.get('msgid', [])),
+                msgstr=''.join(buffers.get('msgstr', [])),
+                msgid_plural=''.join(buffers.get('msgid_plural', [])),
+                msgstr_plural=plural,
+                is_fuzzy=entry['fuzzy'],
+                line=entry['line'],
+                locations=entry['locations'],
+            ))
+
+        with open(self.po_file, encoding='utf-8') as f:
+            for lineno, line in enumerate(f, 1):
+                stripped = line.strip()
+                if not stripped:
+                    if entry is not None and 'msgid' in buffers:
+                        finalize()
+                    entry = None
+                    cur_key = None
+                    buffers = {}
+                    continue
+                if entry is None:
+                    entry = {'fuzzy': False, 'line': lineno, 'locations': []}
+                # dispatch on the first character; continuation lines are
+                # by far the most common, keyword lines all start with 'm'
+                first = stripped[0]
+                if first == '"':
+                    if cur_key is not None:
+                        buffers[cur_key].append(self._extract_string(stripped))
+                elif first == 'm':
+                    if stripped.startswith('msgstr '):
+                        cur_key = 'msgstr'
+                        buffers[cur_key] = [self._extract_string(stripped)]
+                    elif stripped.startswith('msgid '):
+                        cur_key = 'msgid'
+                        entry['line'] = lineno
+                        buffers[cur_key] = [self._extract_string(stripped)]
+                    elif stripped.startswith('msgstr['):
+                        m = _RE_MSGSTR_PLURAL.match(stripped)
+                        if m is not None:
+                            cur_key = ('msgstr', int(m.group(1)))
+                            buffers[cur_key] = [self._extract_string(stripped)]
+                    elif stripped.startswith('msgid_plural '):
+                        cur_key = 'msgid_plural'
+                        buffers[cur_key] = [self._extract_string(stripped)]
+                elif first == '#':
+                    if stripped.startswith('#:'):
+                        entry['locations'].extend(stripped[2:].split())
+                    # a substring test is enough: no other gettext flag
+                    # contains 'fuzzy', so skip splitting out the flag list
+                    elif stripped.startswith('#,') and 'fuzzy' in stripped:
+                        entry['fuzzy'] = True
+        if entry is not None and 'msgid' in buffers:
+            finalize()
+        # drop the header entry to match what polib iterates over
+        return [e for e in entries if e.msgid]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Extract untranslated entries from a locale .po file')
+    parser.add_argument('locale', help='locale name, e.g. de_DE')
+    parser.add_argument('-o', '--output', help='output JSON file '
+                        '(default: untranslated_<locale>.json)')
+    args = parser.parse_args()
+
+    po_file = LOCALE_DIR / args.locale / 'LC_MESSAGES' / f'{args.locale[:2]}.po'
+    if not po_file.exists():
+        print(f'Error: {po_file} not found')
+        return 1
+
+    po_parser = PoParser(po_file)
+    entries = po_parser.parse()
+
+    untranslated = []
+    fuzzy = []
+    excluded_count = 0
+    total_untranslated = 0
+    for entry in entries:
+        needs_work = entry.is_untranslated
+        excluded = needs_work and po_parser.is_excluded(entry.msgid)
+        if needs_work and not excluded:
+            total_untranslated += 1
+        if entry.is_fuzzy:
+            fuzzy.append(entry)
+        elif needs_work:
+            if excluded:
+                excluded_count += 1
+            else:
+                untranslated.append(entry)
+
+    # stream the entries array instead of materializing the whole
+    # document in memory before serializing it
+    output = args.output or f'untranslated_{args.locale}.json'
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write('{\n')
+        for key, value in (('locale', args.locale),
+                           ('po_file', str(po_file)),
+                           ('total_entries', len(entries)),
+                           ('untranslated_count', total_untranslated),
+                           ('fuzzy_count', len(fuzzy)),
+                           ('excluded_count', excluded_count)):
+            f.write('  %s: %s,\n' % (json.dumps(key),
+                                     json.dumps(value, ensure_ascii=False)))
+        f.write('  "entries": [')
+        first = True
+        for entry in itertools.chain(untranslated, fuzzy):
+            entry_data = {
+                'msgid': entry.msgid,
+                'msgstr': entry.msgstr,
+                'fuzzy': entry.is_fuzzy,
+                'line': entry.line,
+                'locations': entry.locations,
+            }
+            if entry.msgid_plural:
+                entry_data['msgid_plural'] = entry.msgid_plural
+                entry_data['msgstr_plural'] = entry.msgstr_plural
+            f.write('\n    ' if first else ',\n    ')
+            json.dump(entry_data, f, ensure_ascii=False)
+            first = False
+        f.write('\n  ]\n}\n')
+
+    print(f'{args.locale}: {len(entries)} entries, '
+          f'{total_untranslated} untranslated, {len(fuzzy)} fuzzy '
+          f'({excluded_count} excluded) -> {output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Import translated strings back into locale .po files.
+
+Takes JSON files produced by extract_untranslated.py in which the
+msgstr fields have been filled in, and rewrites the matching entries in
+each locale's .po file.  Untouched entries are copied through verbatim.
+Multiple files update distinct .po files and are processed in parallel.
+Usage: ./import_translations.py <translations.json> [more.json ...]
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+LOCALE_DIR = Path(__file__).resolve().parent.parent / 'locale'
+
+# escapes backslash and double quote in one pass
+_RE_ESCAPE = re.compile(r'([\\"])')
+_RE_UNESCAPE = re.compile(r'\\(.)')
+_UNESCAPES = {'n': '\n', 't': '\t'}
+
+
+def _unescape_match(m):
+    c = m.group(1)
+    return _UNESCAPES.get(c, c)
+
+
+class PoUpdater:
+    """Rewrite a .po file with translations from a msgid -> msgstr map."""
+
+    def __init__(self, po_file, translations_map):
+        self.po_file = Path(po_file)
+        self.translations_map = translations_map
+        self.updated_count = 0
+
+    def update(self):
+        """Back up the .po file and write the updated version."""
+        backup_file = self.po_file.with_suffix(
+            '.po.bak.%s' % time.strftime('%Y%m%d%H%M%S'))
+        # the rewrite below creates a new file, so a hard link to the
+        # original inode is a full backup without copying any bytes
+        try:
+            os.link(self.po_file, backup_file)
+        except OSError:
+            shutil.copy2(self.po_file, backup_file)
+        with open(self.po_file, encoding='utf-8') as f:
+            content = f.read()
+        updated = self._process_content(content)
+        # write to a new inode and rename over the original, so the
+        # backup link keeps the old content and the update is atomic
+        tmp_file = self.po_file.with_suffix('.po.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(updated)
+        os.replace(tmp_file, self.po_file)
+        return backup_file
+
+    def _process_content(self, content):
+        """Rewrite entries in one pass over the lines.
+
+        Tracks the msgid and msgstr of the entry being scanned while
+        accumulating its raw lines, so each entry is visited exactly
+        once: on the blank line that closes it, the entry is either
+        copied through verbatim or re-emitted with the new msgstr.
+        """
+        output = []
+        entry_lines = []
+        msgid_parts = []
+        msgstr_parts = []
+        section = None  # keyword the next continuation line belongs to
+
+        def flush():
+            if not entry_lines:
+                return
+            msgid = ''.join(msgid_parts)
+            msgstr = self.translations_map.get(msgid)
+            # only rewrite on an actual change; an unedited roundtrip of
+            # the extractor's JSON must not touch (or un-fuzzy) entries
+            if msgid and msgstr and msgstr != ''.join(msgstr_parts):
+                output.extend(self._update_block(entry_lines, msgstr))
+                self.updated_count += 1
+            else:
+                output.extend(entry_lines)
+
+        for line in content.splitlines(keepends=True):
+            stripped = line.strip()
+            if not stripped:
+                flush()
+                entry_lines = []
+                msgid_parts = []
+                msgstr_parts = []
+                section = None
+                output.append(line)
+                continue
+            entry_lines.append(line)
+            if stripped.startswith('msgid '):
+                msgid_parts = [_unescape(stripped[6:])]
+                section = 'msgid'
+            elif stripped.startswith('msgstr '):
+                msgstr_parts = [_unescape(stripped[7:])]
+                section = 'msgstr'
+            elif stripped.startswith('"'):
+                if section == 'msgid':
+                    msgid_parts.append(_unescape(stripped))
+                elif section == 'msgstr':
+                    msgstr_parts.append(_unescape(stripped))
+            else:
+                section = None
+        flush()
+        return ''.join(output)
+
+    def _update_block(self, lines, msgstr):
+        """Return the entry's lines with msgstr replaced and fuzzy cleared."""
+        result = []
+        skipping = False
+        for line in lines:
+            stripped = line.strip()
+            # match 'msgstr ' exactly so msgstr[n] plural lines, which
+            # this map never carries, are left untouched
+            if stripped.startswith('msgstr '):
+                result.extend('%s\n' % part
+                              for part in self._format_string(msgstr))
+                skipping = True
+            elif skipping and stripped.startswith('"'):
+                continue  # old msgstr continuation
+            elif stripped.startswith('#,') and 'fuzzy' in line:
+                flags = [f.strip() for f in stripped[2:].split(',')
+                         if f.strip() != 'fuzzy']
+                if flags:
+                    result.append('#, %s\n' % ', '.join(flags))
+                skipping = False
+            else:
+                result.append(line)
+                skipping = False
+        return result
+
+    @staticmethod
+    def _format_string(s):
+        """Format a translation as 'msgstr ...' po line(s)."""
+        if not ('\\' in s or '"' in s or '\t' in s or '\n' in s):
+            # nothing to escape, which covers most translations
+            return ['msgstr "%s"' % s]
+        escaped = _RE_ESCAPE.sub(r'\\\1', s).replace('\t', '\\t')
+        if '\n' not in escaped:
+            return ['msgstr "%s"' % escaped]
+        lines = ['msgstr ""']
+        parts = escaped.split('\n')
+        for i, part in enumerate(parts):
+            if i < len(parts) - 1:
+                lines.append('"%s\\n"' % part)
+            elif part:
+                lines.append('"%s"' % part)
+        return lines
+
+
+def _unescape(line):
+    """Strip surrounding quotes from a po string fragment and unescape."""
+    s = line[line.index('"') + 1:line.rindex('"')]
+    if '\\' not in s:
+        return s
+    # decode left to right in one pass so '\\\\' followed by 'n' or 't'
+    # is an escaped backslash, not a newline or tab
+    return _RE_UNESCAPE.sub(_unescape_match, s)
+
+
+def import_one(json_file):
+    """Import one JSON file; runs in a worker process.
+
+    Returns (exit_code, message) so the workers never write to stdout
+    themselves.
+    """
+    with open(json_file, encoding='utf-8') as f:
+        data = json.load(f)
+
+    locale = data['locale']
+    po_file = Path(data.get('po_file') or
+                   LOCALE_DIR / locale / 'LC_MESSAGES' / f'{locale[:2]}.po')
+    if not po_file.exists():
+        return 1, f'Error: {po_file} not found'
+
+    translations_map = {}
+    skipped_plural = 0
+    for entry in data.get('entries', []):
+        if entry.get('msgid_plural'):
+            # plural entries need their msgstr[n] forms rewritten, which
+            # the updater does not support; replacing them with a plain
+            # msgstr would produce a .po file msgfmt rejects
+            skipped_plural += 1
+            continue
+        if entry.get('msgstr') and entry['msgstr'] != entry['msgid']:
+            translations_map[entry['msgid']] = entry['msgstr']
+    note = (f' (warning: {skipped_plural} plural entries skipped)'
+            if skipped_plural else '')
+    if not translations_map:
+        return 0, f'{locale}: nothing to import{note}'
+
+    updater = PoUpdater(po_file, translations_map)
+    backup_file = updater.update()
+    return 0, (f'{locale}: updated {updater.updated_count} of '
+               f'{len(translations_map)} entries in {po_file} '
+               f'(backup: {backup_file.name}){note}')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Import translated strings into locale .po files')
+    parser.add_argument('json_files', nargs='+',
+                        help='JSON files from extract_untranslated.py '
+                        'with filled-in msgstr values')
+    args = parser.parse_args()
+
+    # each JSON file updates its own locale's .po file, so bulk imports
+    # can run in parallel
+    if len(args.json_files) > 1:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = list(executor.map(import_one, args.json_files))
+    else:
+        results = [import_one(args.json_files[0])]
+
+    rc = 0
+    for code, message in results:
+        print(message)
+        rc = rc or code
+    return rc
+
+
+if __name__ == '__main__':
+    sys.exit(main())